@@ -6,8 +6,16 @@
 - Supporting padding and no padding options
 """
 
-import random
+import argparse
+import itertools
+import multiprocessing
+import mmap
+import os
+import secrets
 import string
+import struct
+import sys
+import time
 
 # DES Constants
 # Initial Permutation (IP) table
@@ -262,53 +270,39 @@ def des_round(left_half, right_half, subkey):
     
     return new_left, new_right
 
-def des_encrypt(plaintext_64bit, key_64bit):
-    """Perform DES encryption on a 64-bit plaintext block"""
-    # Generate subkeys
-    subkeys = generate_subkeys(key_64bit)
-    
+def des_process_block(block_64bit, subkeys):
+    """Run the 16 DES rounds on a 64-bit block with an already generated key schedule"""
     # Initial permutation
-    permuted = permute(plaintext_64bit, IP)
+    permuted = permute(block_64bit, IP)
     
     # Split into left and right halves
     left = permuted[:32]
     right = permuted[32:]
     
-    # 16 rounds of encryption
-    for i in range(16):
-        left, right = des_round(left, right, subkeys[i])
+    # 16 rounds, using the subkeys in the order given
+    for subkey in subkeys:
+        left, right = des_round(left, right, subkey)
     
     # Swap left and right halves after the 16th round
     combined = right + left
     
     # Final permutation
-    ciphertext = permute(combined, FP)
+    return permute(combined, FP)
+
+def des_encrypt(plaintext_64bit, key_64bit):
+    """Perform DES encryption on a 64-bit plaintext block"""
+    # Generate subkeys
+    subkeys = generate_subkeys(key_64bit)
     
-    return ciphertext
+    return des_process_block(plaintext_64bit, subkeys)
 
 def des_decrypt(ciphertext_64bit, key_64bit):
     """Perform DES decryption on a 64-bit ciphertext block"""
     # Generate subkeys
     subkeys = generate_subkeys(key_64bit)
     
-    # Initial permutation
-    permuted = permute(ciphertext_64bit, IP)
-    
-    # Split into left and right halves
-    left = permuted[:32]
-    right = permuted[32:]
-    
-    # 16 rounds of decryption (using subkeys in reverse order)
-    for i in range(15, -1, -1):
-        left, right = des_round(left, right, subkeys[i])
-    
-    # Swap left and right halves after the 16th round
-    combined = right + left
-    
-    # Final permutation
-    plaintext = permute(combined, FP)
-    
-    return plaintext
+    # Decryption uses the subkeys in reverse order
+    return des_process_block(ciphertext_64bit, subkeys[::-1])
 
 def pad_text(text, block_size=8):
     """Add PKCS#7 padding to the text"""
@@ -555,8 +549,811 @@ def triple_des_decrypt(ciphertext, key1, key2, key3, use_padding=True, is_hex=Fa
 
 def generate_random_key():
     """Generate a random ASCII key"""
-    # Generate 8 random printable ASCII characters
-    return ''.join(random.choice(string.printable[:95]) for _ in range(8))
+    # Generate 8 random printable ASCII characters from the OS random source
+    return ''.join(secrets.choice(string.printable[:95]) for _ in range(8))
+
+# Table-driven DES on integers
+# The string-based functions above follow the standard step by step; the functions below
+# compute the same cipher on Python integers with precomputed lookup tables, for the
+# bulk paths (audit, batch) where the per-block cost matters
+def build_permutation_tables(table, input_bits=64):
+    """
+    Build byte-wise lookup tables for a bit permutation on integers
+    tables[i][byte] holds the output bits produced by input byte i (most significant first)
+    """
+    output_bits = len(table)
+    bit_masks = [0] * input_bits
+    for j, pos in enumerate(table):
+        bit_masks[pos - 1] |= 1 << (output_bits - 1 - j)
+    
+    tables = []
+    for i in range(input_bits // 8):
+        contributions = []
+        for value in range(256):
+            bits = 0
+            for bit in range(8):
+                if (value >> (7 - bit)) & 1:
+                    bits |= bit_masks[i * 8 + bit]
+            contributions.append(bits)
+        tables.append(contributions)
+    return tables
+
+def permute_int(block, tables):
+    """Permute a 64-bit integer block with tables from build_permutation_tables"""
+    result = 0
+    for i, contributions in enumerate(tables):
+        result |= contributions[(block >> (56 - 8 * i)) & 0xFF]
+    return result
+
+def build_sp_tables():
+    """
+    Combine each S-box with the P permutation
+    sp[i][chunk] is the 32-bit f output contributed by S-box i for a 6-bit input chunk
+    """
+    sp = []
+    for i in range(8):
+        contributions = []
+        for chunk in range(64):
+            # Row from the outer bits, column from the middle 4 bits (as in apply_sbox)
+            row = ((chunk >> 5) << 1) | (chunk & 1)
+            col = (chunk >> 1) & 0xF
+            sboxed = '0000' * i + format(S_BOXES[i][row][col], '04b') + '0000' * (7 - i)
+            contributions.append(int(permute(sboxed, P), 2))
+        sp.append(contributions)
+    return sp
+
+IP_TABLES = build_permutation_tables(IP)
+FP_TABLES = build_permutation_tables(FP)
+SP_TABLES = build_sp_tables()
+
+def des_rounds_int(permuted_block, subkeys):
+    """
+    Run the 16 rounds on an integer block that has already been through IP
+    subkeys are 48-bit integers; the result has the halves swapped, ready for FP
+    """
+    sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = SP_TABLES
+    left = permuted_block >> 32
+    right = permuted_block & 0xFFFFFFFF
+    
+    for k in subkeys:
+        # E expansion: chunk i of E(right) is bits 4i..4i+5 of right with its last bit
+        # copied in front and its first bit copied behind (34 bits in total)
+        x = ((right & 1) << 33) | (right << 1) | (right >> 31)
+        left, right = right, left ^ (
+            sp0[((x >> 28) ^ (k >> 42)) & 0x3F] |
+            sp1[((x >> 24) ^ (k >> 36)) & 0x3F] |
+            sp2[((x >> 20) ^ (k >> 30)) & 0x3F] |
+            sp3[((x >> 16) ^ (k >> 24)) & 0x3F] |
+            sp4[((x >> 12) ^ (k >> 18)) & 0x3F] |
+            sp5[((x >> 8) ^ (k >> 12)) & 0x3F] |
+            sp6[((x >> 4) ^ (k >> 6)) & 0x3F] |
+            sp7[(x ^ k) & 0x3F])
+    
+    return (right << 32) | left
+
+# Key-strength audit
+# Character classes accepted in audit masks ("?l?l?l?d" style placeholders)
+MASK_CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': string.punctuation + ' ',
+    'a': string.printable[:95],
+}
+
+def parse_mask(mask):
+    """Expand an audit mask into one charset per key character (8 positions)"""
+    charsets = []
+    i = 0
+    while i < len(mask):
+        if mask[i] == '?' and i + 1 < len(mask):
+            placeholder = mask[i+1]
+            if placeholder == '?':
+                charsets.append('?')
+            elif placeholder in MASK_CHARSETS:
+                charsets.append(MASK_CHARSETS[placeholder])
+            else:
+                raise ValueError(f"Unknown mask placeholder '?{placeholder}'")
+            i += 2
+        else:
+            # Key characters are single bytes (see text_to_binary)
+            if ord(mask[i]) > 255:
+                raise ValueError(f"Mask character {mask[i]!r} is not a single-byte (latin-1) character")
+            charsets.append(mask[i])
+            i += 1
+    
+    # Mirror prepare_key: short keys are padded with spaces, long keys truncated
+    while len(charsets) < 8:
+        charsets.append(' ')
+    return charsets[:8]
+
+def schedule_sources():
+    """Map each bit of the 16 concatenated subkeys (768 bits) to its source bit in the 64-bit key"""
+    # Run the key schedule on bit indices instead of bit values
+    key_56bit = [pos - 1 for pos in PC1]
+    left = key_56bit[:28]
+    right = key_56bit[28:]
+    
+    sources = []
+    for i in range(16):
+        left = shift_left(left, SHIFT_TABLE[i])
+        right = shift_left(right, SHIFT_TABLE[i])
+        combined = left + right
+        sources.extend(combined[pos - 1] for pos in PC2)
+    
+    return sources
+
+def build_schedule_table():
+    """
+    Build per-character key schedule contributions
+    table[position][byte] is the 768-bit schedule produced by that byte alone at that
+    key position, so a full schedule is the OR of the 8 entries for a key
+    """
+    sources = schedule_sources()
+    
+    # One 768-bit mask per key bit, telling which schedule bits it lands in
+    bit_masks = [0] * 64
+    for j, source in enumerate(sources):
+        bit_masks[source] |= 1 << (767 - j)
+    
+    table = []
+    for position in range(8):
+        contributions = []
+        for value in range(256):
+            schedule = 0
+            for bit in range(8):
+                if (value >> (7 - bit)) & 1:
+                    schedule |= bit_masks[position * 8 + bit]
+            contributions.append(schedule)
+        table.append(contributions)
+    
+    return table
+
+def schedule_to_int_subkeys(schedule):
+    """Split a 768-bit schedule integer into the 16 subkeys as 48-bit integers"""
+    return [(schedule >> (48 * (15 - i))) & 0xFFFFFFFFFFFF for i in range(16)]
+
+# Per-process audit state, filled in by init_audit_worker
+AUDIT_STATE = {}
+
+def init_audit_worker(table, permuted_plaintext, target):
+    """Pool initializer: share the schedule table and the known block with a worker"""
+    AUDIT_STATE['table'] = table
+    AUDIT_STATE['permuted_plaintext'] = permuted_plaintext
+    AUDIT_STATE['target'] = target
+
+def audit_block_matches(schedule):
+    """Check whether a candidate schedule maps the known plaintext block to the known ciphertext"""
+    # IP of the plaintext is computed once per audit, not per candidate, and the result
+    # is compared before FP: the target is IP(ciphertext), since IP undoes FP
+    subkeys = schedule_to_int_subkeys(schedule)
+    return des_rounds_int(AUDIT_STATE['permuted_plaintext'], subkeys) == AUDIT_STATE['target']
+
+def audit_words(words):
+    """Worker: test a sorted chunk of 8-character candidate keys, reusing common prefixes"""
+    table = AUDIT_STATE['table']
+    found = []
+    
+    # partial[i] is the OR of the schedule contributions of the first i characters
+    partial = [0] * 9
+    previous = ""
+    for word in words:
+        shared = 0
+        while shared < 8 and word[shared] == previous[shared:shared+1]:
+            shared += 1
+        for i in range(shared, 8):
+            partial[i+1] = partial[i] | table[i][ord(word[i])]
+        previous = word
+        
+        if audit_block_matches(partial[8]):
+            found.append(word)
+    
+    return found, len(words), len(words)
+
+def audit_mask(prefix, prefix_covered, charsets):
+    """
+    Worker: test every key starting with prefix whose remaining characters come from charsets
+    charsets holds (representative, class_size) pairs per position; prefix_covered is the
+    number of keys the prefix stands for. Returns (found, keys_covered, keys_tested)
+    """
+    table = AUDIT_STATE['table']
+    found = []
+    tested = 0
+    covered = 0
+    
+    partial = 0
+    for i, char in enumerate(prefix):
+        partial |= table[i][ord(char)]
+    
+    # Depth-first walk so each schedule prefix is built once and shared by its subtree
+    start = len(prefix)
+    stack = [(start, partial, prefix, prefix_covered)]
+    while stack:
+        position, schedule, key, key_covered = stack.pop()
+        if position == 8:
+            tested += 1
+            covered += key_covered
+            if audit_block_matches(schedule):
+                found.append(key)
+            continue
+        contributions = table[position]
+        for char, class_size in charsets[position - start]:
+            stack.append((position + 1, schedule | contributions[ord(char)], key + char,
+                          key_covered * class_size))
+    
+    return found, covered, tested
+
+def run_audit_task(task):
+    """Dispatch one audit task to the matching worker function"""
+    kind, payload = task
+    if kind == 'words':
+        return audit_words(payload)
+    return audit_mask(*payload)
+
+def parity_classes(charset):
+    """
+    Group characters that differ only in their lowest bit
+    DES ignores the low (parity) bit of each key byte, so such characters give identical
+    schedules and only one of them needs testing
+    """
+    classes = {}
+    for char in charset:
+        classes.setdefault(ord(char) >> 1, []).append(char)
+    return {members[0]: members for members in classes.values()}
+
+def audit_keys(plaintext, ciphertext_hex, wordlist=None, mask=None, workers=None, chunk_size=2000,
+               use_padding=True):
+    """
+    Search for a key that maps a known plaintext to a known ciphertext
+    The candidate is used as K1 = K2 = K3 (Single-Key 3DES), so only the first block
+    of the pair is needed. Returns (found_keys, keys_covered, keys_tested, elapsed_seconds);
+    keys_covered counts every key the search ruled in or out, keys_tested only the ones
+    run through DES (one per parity class). use_padding must match the setting the
+    ciphertext was produced with: PKCS#7 or zero-filled short plaintexts
+    """
+    # Rebuild the first block exactly as triple_des_encrypt would feed it to DES
+    if len(plaintext) < 8:
+        plaintext = pad_text(plaintext) if use_padding else plaintext.ljust(8, '\0')
+    block = int(text_to_binary(plaintext[:8]), 2)
+    
+    clean_hex = ''.join(c for c in ciphertext_hex if c in "0123456789ABCDEFabcdef")
+    if len(clean_hex) < 16:
+        raise ValueError("Ciphertext must contain at least one full block (16 hex digits)")
+    target = permute_int(int(clean_hex[:16], 16), IP_TABLES)
+    
+    table = build_schedule_table()
+    
+    tasks = []
+    expand = None
+    if wordlist is not None:
+        # Normalize like prepare_key, drop duplicates and keys DES cannot represent
+        keys = set()
+        for word in wordlist:
+            key = word.ljust(8)[:8]
+            if all(ord(c) < 256 for c in key):
+                keys.add(key)
+        keys = sorted(keys)
+        for i in range(0, len(keys), chunk_size):
+            tasks.append(('words', keys[i:i+chunk_size]))
+    else:
+        charsets = parse_mask(mask)
+        classes = [parity_classes(charset) for charset in charsets]
+        # Each representative stands for every character of its parity class
+        representatives = [[(char, len(members)) for char, members in c.items()] for c in classes]
+        
+        # Split on enough leading positions that the pool gets many similar-sized tasks
+        split = 0
+        task_count = 1
+        while split < 8 and task_count < 256:
+            task_count *= len(representatives[split])
+            split += 1
+        for prefix in itertools.product(*representatives[:split]):
+            prefix_covered = 1
+            for _, class_size in prefix:
+                prefix_covered *= class_size
+            tasks.append(('mask', (''.join(char for char, _ in prefix), prefix_covered,
+                                   representatives[split:])))
+        
+        def expand(key):
+            return [''.join(k) for k in itertools.product(*(classes[i][c] for i, c in enumerate(key)))]
+    
+    found = []
+    covered = 0
+    tested = 0
+    start_time = time.time()
+    with multiprocessing.Pool(workers, init_audit_worker, (table, permute_int(block, IP_TABLES), target)) as pool:
+        for task_found, task_covered, task_tested in pool.imap_unordered(run_audit_task, tasks):
+            found.extend(task_found)
+            covered += task_covered
+            tested += task_tested
+    elapsed = time.time() - start_time
+    
+    if expand is not None:
+        found = [key for representative in found for key in expand(representative)]
+    
+    return sorted(found), covered, tested, elapsed
+
+def audit_command(args):
+    """Run the key-strength audit from the command line"""
+    if args.wordlist:
+        with open(args.wordlist, encoding='latin-1') as f:
+            wordlist = [line.rstrip('\r\n') for line in f if line.rstrip('\r\n')]
+        found, covered, tested, elapsed = audit_keys(args.plaintext, args.ciphertext,
+                                                     wordlist=wordlist, workers=args.workers,
+                                                     use_padding=not args.no_padding)
+    else:
+        found, covered, tested, elapsed = audit_keys(args.plaintext, args.ciphertext,
+                                                     mask=args.mask, workers=args.workers,
+                                                     use_padding=not args.no_padding)
+    
+    print("=" * 50)
+    print("3DES Key-Strength Audit")
+    print("=" * 50)
+    print(f"Candidate keys covered: {covered}")
+    if tested != covered:
+        print(f"Keys run through DES: {tested} (one per parity-equivalent group)")
+    print(f"Elapsed time: {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Test rate: {covered / elapsed:.0f} keys/s")
+    
+    if found:
+        print("\nKEY FOUND - the deployed key is guessable:")
+        for key in found:
+            print(f"  {key!r}")
+        if len(found) > 1:
+            print("(DES ignores the lowest bit of each key character, so these keys are equivalent)")
+    else:
+        print("\nNo candidate matched the known plaintext/ciphertext pair.")
+
+def positive_int_arg(value):
+    """argparse type for strictly positive integers"""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+# Batch file processing
+# Files are streamed in chunks of this many bytes (a multiple of the 8-byte block)
+BATCH_CHUNK_SIZE = 64 * 1024
+
+# Suffix added to encrypted files and stripped again on decryption
+ENCRYPTED_SUFFIX = '.3des'
+
+def triple_des_schedules(key1, key2, key3, decrypt=False):
+    """
+    Build the three DES key schedules in the order Triple DES applies them
+    Encryption is E(K1) -> D(K2) -> E(K3), decryption is D(K3) -> E(K2) -> D(K1).
+    Subkeys are 48-bit integers, as used by triple_des_process_bytes
+    """
+    subkeys1 = [int(subkey, 2) for subkey in generate_subkeys(prepare_key(key1))]
+    subkeys2 = [int(subkey, 2) for subkey in generate_subkeys(prepare_key(key2))]
+    subkeys3 = [int(subkey, 2) for subkey in generate_subkeys(prepare_key(key3))]
+    
+    return arrange_schedules(subkeys1, subkeys2, subkeys3, decrypt)
+
+def arrange_schedules(subkeys1, subkeys2, subkeys3, decrypt=False):
+    """Order (and reverse where needed) three generated key schedules for Triple DES"""
+    if decrypt:
+        return [subkeys3[::-1], subkeys2, subkeys1[::-1]]
+    return [subkeys1, subkeys2[::-1], subkeys3]
+
+def triple_des_process_bytes(data, schedules):
+    """Run Triple DES (ECB) over bytes whose length is a multiple of 8"""
+    subkeys1, subkeys2, subkeys3 = schedules
+    block_count = len(data) // 8
+    blocks = struct.unpack(f'>{block_count}Q', data)
+    
+    output = []
+    for block in blocks:
+        # FP of one DES stage is undone by IP of the next, so only the outer IP/FP are needed
+        block = des_rounds_int(permute_int(block, IP_TABLES), subkeys1)
+        block = des_rounds_int(block, subkeys2)
+        block = des_rounds_int(block, subkeys3)
+        output.append(permute_int(block, FP_TABLES))
+    return struct.pack(f'>{block_count}Q', *output)
+
+def stream_file(source, destination, schedules, decrypt=False, use_padding=True, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Encrypt or decrypt one file in fixed-size chunks, so memory stays bounded by chunk_size
+    The output is written to a temporary .part file and renamed into place once complete
+    """
+    partial_path = destination + '.part'
+    try:
+        with open(source, 'rb') as infile, open(partial_path, 'wb') as outfile:
+            pending = b''
+            while True:
+                chunk = infile.read(chunk_size)
+                if not chunk:
+                    break
+                pending += chunk
+                
+                # Keep the trailing partial block, and on decryption the last full block too,
+                # since padding can only be handled once the end of the file is known
+                keep = len(pending) % 8
+                if decrypt and keep == 0:
+                    keep = 8
+                ready = len(pending) - keep
+                outfile.write(triple_des_process_bytes(pending[:ready], schedules))
+                pending = pending[ready:]
+            
+            if decrypt:
+                if len(pending) % 8 != 0:
+                    raise ValueError("Ciphertext length is not a multiple of 8 bytes")
+                last = triple_des_process_bytes(pending, schedules)
+                if use_padding:
+                    last = unpad_text(last.decode('latin-1')).encode('latin-1')
+                outfile.write(last)
+            else:
+                if use_padding:
+                    # PKCS#7, always adding a full block for complete input, as triple_des_encrypt does
+                    pending = pad_text(pending.decode('latin-1')).encode('latin-1')
+                elif pending:
+                    pending = pending.ljust(8, b'\0')
+                outfile.write(triple_des_process_bytes(pending, schedules))
+            
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        
+        os.replace(partial_path, destination)
+    except BaseException:
+        # Do not leave a half-written .part file behind for a failed (or interrupted) job
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+def batch_output_path(relative_path, output_dir, decrypt=False):
+    """Map an input path (relative to the batch root) to its output path"""
+    if not decrypt:
+        relative_path += ENCRYPTED_SUFFIX
+    elif relative_path.endswith(ENCRYPTED_SUFFIX):
+        relative_path = relative_path[:-len(ENCRYPTED_SUFFIX)]
+    else:
+        relative_path += '.dec'
+    return os.path.join(output_dir, relative_path)
+
+def collect_batch_files(source, output_dir):
+    """
+    List (path, relative_path) pairs for a batch run
+    source is either a directory, which is walked recursively, or a manifest file with one
+    path per line, relative to the manifest's own directory
+    """
+    files = []
+    if os.path.isdir(source):
+        # Outputs written next to their inputs would be picked up as new inputs on a rerun
+        if os.path.realpath(source) == os.path.realpath(output_dir):
+            raise ValueError("Output directory must differ from the source directory")
+        for root, dirs, names in os.walk(source):
+            # Never pick up our own outputs when the output directory sits inside the source
+            dirs[:] = [d for d in dirs
+                       if os.path.abspath(os.path.join(root, d)) != os.path.abspath(output_dir)]
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                files.append((path, os.path.relpath(path, source)))
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding='utf-8') as manifest:
+            for line in manifest:
+                entry = line.strip()
+                if not entry or entry.startswith('#'):
+                    continue
+                path = os.path.join(base, entry)
+                relative_path = os.path.relpath(path, base)
+                if relative_path.startswith(os.pardir):
+                    raise ValueError(f"Manifest entry is outside the manifest directory: {entry}")
+                files.append((path, relative_path))
+    return files
+
+# Per-process batch state, filled in by init_batch_worker
+BATCH_STATE = {}
+
+def init_batch_worker(schedules, decrypt, use_padding, chunk_size):
+    """Pool initializer: share the arranged key schedules and options with a worker"""
+    BATCH_STATE['schedules'] = schedules
+    BATCH_STATE['decrypt'] = decrypt
+    BATCH_STATE['use_padding'] = use_padding
+    BATCH_STATE['chunk_size'] = chunk_size
+
+def run_batch_job(job):
+    """Worker: process one file and return (path, size, seconds, error)"""
+    source, destination, size = job
+    start_time = time.time()
+    try:
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        stream_file(source, destination, BATCH_STATE['schedules'], BATCH_STATE['decrypt'],
+                    BATCH_STATE['use_padding'], BATCH_STATE['chunk_size'])
+    except Exception as e:
+        return source, size, time.time() - start_time, str(e)
+    return source, size, time.time() - start_time, None
+
+def format_rate(size, seconds):
+    """Format a throughput in KB/s"""
+    if seconds <= 0:
+        return "-"
+    return f"{size / 1024 / seconds:.1f} KB/s"
+
+def batch_command(args):
+    """Run a batch encryption/decryption job from the command line"""
+    decrypt = args.operation == 'decrypt'
+    if args.schedule_file:
+        # Use a provisioned record as is, without running generate_subkeys
+        if args.record is None:
+            raise ValueError("--record is required with --schedule-file")
+        if args.key2 is not None or args.key3 is not None or args.hex_keys:
+            raise ValueError("--key2, --key3 and --hex-keys cannot be used with --schedule-file")
+        mapping, count = open_schedule_file(args.schedule_file)
+        try:
+            _, subkey_lists = read_schedule_record(mapping, count, args.record)
+        except IndexError as e:
+            raise ValueError(str(e))
+        finally:
+            mapping.close()
+        schedules = arrange_schedules(*subkey_lists, decrypt=decrypt)
+    else:
+        if args.record is not None:
+            raise ValueError("--record can only be used with --schedule-file")
+        key1 = args.key1
+        key2 = args.key2 if args.key2 is not None else key1
+        key3 = args.key3 if args.key3 is not None else key1
+        if args.hex_keys:
+            # Raw 8-byte keys, e.g. from 'provision --format text'
+            key1, key2, key3 = (hex_to_key(key) for key in (key1, key2, key3))
+        schedules = triple_des_schedules(key1, key2, key3, decrypt=decrypt)
+    
+    # Files whose output already exists were completed by an earlier run (outputs are
+    # only renamed into place when finished), so they are skipped on resume
+    jobs = []
+    unreadable = []
+    skipped = 0
+    for path, relative_path in collect_batch_files(args.source, args.output):
+        destination = batch_output_path(relative_path, args.output, decrypt)
+        if os.path.exists(destination):
+            skipped += 1
+            continue
+        # A missing or unreadable input fails on its own instead of aborting the whole run
+        try:
+            jobs.append((path, destination, os.path.getsize(path)))
+        except OSError as e:
+            unreadable.append((path, e.strerror or str(e)))
+    
+    # Largest files first, so the slow ones do not end up alone at the tail of the run
+    jobs.sort(key=lambda job: job[2], reverse=True)
+    
+    print("=" * 50)
+    print(f"3DES Batch {'Decryption' if decrypt else 'Encryption'}")
+    print("=" * 50)
+    print(f"Files to process: {len(jobs) + len(unreadable)} (skipped {skipped} already done)")
+    
+    for source, error in unreadable:
+        print(f"FAILED {source}: {error}")
+    
+    failed = len(unreadable)
+    processed = 0
+    total_bytes = 0
+    start_time = time.time()
+    with multiprocessing.Pool(args.workers, init_batch_worker,
+                              (schedules, decrypt, not args.no_padding, args.chunk_size)) as pool:
+        for source, size, seconds, error in pool.imap_unordered(run_batch_job, jobs):
+            if error:
+                failed += 1
+                print(f"FAILED {source}: {error}")
+            else:
+                processed += 1
+                total_bytes += size
+                print(f"{source}: {size} bytes in {seconds:.2f} s ({format_rate(size, seconds)})")
+    elapsed = time.time() - start_time
+    
+    print("\nSummary:")
+    print(f"Processed: {processed}, skipped: {skipped}, failed: {failed}")
+    print(f"Total: {total_bytes} bytes in {elapsed:.2f} s ({format_rate(total_bytes, elapsed)})")
+    
+    if failed:
+        sys.exit(1)
+
+def hex_to_key(hex_key):
+    """Decode a 16-digit hex key into the 8-character (latin-1) form prepare_key expects"""
+    try:
+        key = bytes.fromhex(hex_key)
+    except ValueError:
+        raise ValueError(f"Invalid hex key: {hex_key!r}")
+    if len(key) != 8:
+        raise ValueError(f"Hex keys must be 16 hex digits (8 bytes): {hex_key!r}")
+    return key.decode('latin-1')
+
+def chunk_size_arg(value):
+    """argparse type for chunk sizes: a positive multiple of the 8-byte block"""
+    size = int(value)
+    if size <= 0 or size % 8 != 0:
+        raise argparse.ArgumentTypeError("chunk size must be a positive multiple of 8")
+    return size
+
+# Bulk key provisioning
+# DES weak and semi-weak keys, compared with the parity bits cleared
+WEAK_KEYS = {bytes(b & 0xFE for b in bytes.fromhex(k)) for k in [
+    # Weak keys
+    '0101010101010101', 'FEFEFEFEFEFEFEFE', 'E0E0E0E0F1F1F1F1', '1F1F1F1F0E0E0E0E',
+    # Semi-weak key pairs
+    '011F011F010E010E', '1F011F010E010E01', '01E001E001F101F1', 'E001E001F101F101',
+    '01FE01FE01FE01FE', 'FE01FE01FE01FE01', '1FE01FE00EF10EF1', 'E01FE01FF10EF10E',
+    '1FFE1FFE0EFE0EFE', 'FE1FFE1FFE0EFE0E', 'E0FEE0FEF1FEF1FE', 'FEE0FEE0FEF1FEF1',
+]}
+
+# Schedule file layout: header (magic, version, key length, record count), then records of
+# three 8-byte keys followed by their three 768-bit schedules (16 subkeys of 48 bits each)
+SCHEDULE_MAGIC = b'3DKS'
+SCHEDULE_VERSION = 1
+SCHEDULE_HEADER = struct.Struct('<4sHHQ')
+SCHEDULE_BYTES = 16 * 48 // 8
+SCHEDULE_RECORD_SIZE = 3 * 8 + 3 * SCHEDULE_BYTES
+
+def random_keys(randomness_size=64 * 1024):
+    """
+    Yield random 8-byte keys, reading OS randomness in large chunks
+    Keys use all 256 byte values (as latin-1 strings, which prepare_key accepts): a
+    printable-ASCII alphabet would leave only 48 parity classes per byte, about 44.7
+    effective bits per DES key instead of 56
+    """
+    while True:
+        randomness = os.urandom(randomness_size - randomness_size % 8)
+        for i in range(0, len(randomness), 8):
+            yield randomness[i:i+8].decode('latin-1')
+
+def key_parity_stripped(key):
+    """Return the key bytes with the DES parity bits cleared"""
+    return bytes(ord(c) & 0xFE for c in key)
+
+def is_weak_key(key):
+    """Check whether an 8-character key is a DES weak or semi-weak key"""
+    return key_parity_stripped(key) in WEAK_KEYS
+
+def generate_key_triples(count):
+    """
+    Yield count random Three-Key 3DES key triples
+    Weak and semi-weak keys are rejected, as are triples where K1 = K2 or K2 = K3 (up to
+    parity bits), since those collapse Triple DES into single DES
+    """
+    keys = random_keys()
+    for _ in range(count):
+        triple = []
+        while len(triple) < 3:
+            key = next(keys)
+            if is_weak_key(key):
+                continue
+            if triple and key_parity_stripped(key) == key_parity_stripped(triple[-1]):
+                continue
+            triple.append(key)
+        yield tuple(triple)
+
+def write_schedule_file(path, triples, count):
+    """Write key triples and their precomputed key schedules to a binary schedule file"""
+    table = build_schedule_table()
+    
+    with open(path, 'wb') as f:
+        f.write(SCHEDULE_HEADER.pack(SCHEDULE_MAGIC, SCHEDULE_VERSION, 8, count))
+        
+        written = 0
+        buffer = bytearray()
+        for triple in triples:
+            buffer += ''.join(triple).encode('latin-1')
+            for key in triple:
+                schedule = 0
+                for i, char in enumerate(key):
+                    schedule |= table[i][ord(char)]
+                buffer += schedule.to_bytes(SCHEDULE_BYTES, 'big')
+            written += 1
+            if len(buffer) >= 1024 * 1024:
+                f.write(buffer)
+                buffer.clear()
+        f.write(buffer)
+    
+    if written != count:
+        raise ValueError(f"Expected {count} key triples, got {written}")
+
+def open_schedule_file(path):
+    """
+    Memory-map a schedule file and return (mapping, record_count)
+    Records are read with read_schedule_record, without running generate_subkeys
+    """
+    with open(path, 'rb') as f:
+        # mmap cannot map an empty file, and such a file has no header anyway
+        if os.fstat(f.fileno()).st_size < SCHEDULE_HEADER.size:
+            raise ValueError("Not a supported 3DES schedule file")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    try:
+        magic, version, key_length, count = SCHEDULE_HEADER.unpack_from(mapping, 0)
+        if magic != SCHEDULE_MAGIC or version != SCHEDULE_VERSION or key_length != 8:
+            raise ValueError("Not a supported 3DES schedule file")
+        if len(mapping) != SCHEDULE_HEADER.size + count * SCHEDULE_RECORD_SIZE:
+            raise ValueError("Schedule file is truncated or corrupt")
+    except BaseException:
+        mapping.close()
+        raise
+    
+    return mapping, count
+
+def read_schedule_record(mapping, count, index):
+    """
+    Read one record from a schedule file mapped by open_schedule_file (count records)
+    Returns ((key1, key2, key3), [subkeys1, subkeys2, subkeys3]) with 48-bit integer
+    subkeys; pass the subkey lists to arrange_schedules to encrypt or decrypt with them
+    """
+    # Out-of-range reads would silently return header bytes or an all-zero schedule
+    if not 0 <= index < count:
+        raise IndexError(f"Schedule record {index} out of range (file has {count} records)")
+    
+    offset = SCHEDULE_HEADER.size + index * SCHEDULE_RECORD_SIZE
+    keys = mapping[offset:offset+24].decode('latin-1')
+    triple = (keys[:8], keys[8:16], keys[16:])
+    
+    subkey_lists = []
+    offset += 24
+    for _ in range(3):
+        schedule = int.from_bytes(mapping[offset:offset+SCHEDULE_BYTES], 'big')
+        subkey_lists.append(schedule_to_int_subkeys(schedule))
+        offset += SCHEDULE_BYTES
+    
+    return triple, subkey_lists
+
+def provision_command(args):
+    """Generate key triples in bulk from the command line"""
+    start_time = time.time()
+    triples = generate_key_triples(args.count)
+    
+    if args.format == 'binary':
+        write_schedule_file(args.output, triples, args.count)
+    else:
+        # One tab-separated triple of hex-encoded keys per line (keys are raw bytes)
+        with open(args.output, 'w', encoding='ascii', newline='\n') as f:
+            for triple in triples:
+                f.write('\t'.join(key.encode('latin-1').hex() for key in triple) + '\n')
+    elapsed = time.time() - start_time
+    
+    print(f"Provisioned {args.count} key triples to {args.output} in {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Rate: {args.count / elapsed:.0f} triples/s")
+
+def build_parser():
+    """Build the command-line parser for the non-interactive commands"""
+    parser = argparse.ArgumentParser(description="3DES (Triple DES) Encryption/Decryption Tool")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    audit = subparsers.add_parser('audit', help="Audit Single-Key 3DES ASCII keys against a known pair")
+    audit.add_argument('plaintext', help="Known plaintext (the first 8 characters are used)")
+    audit.add_argument('ciphertext', help="Matching ciphertext in hex (the first block is used)")
+    candidates = audit.add_mutually_exclusive_group(required=True)
+    candidates.add_argument('--wordlist', help="File with one candidate key per line")
+    candidates.add_argument('--mask', help="Charset mask, e.g. '?u?l?l?l?d?d' (?l ?u ?d ?s ?a ??)")
+    audit.add_argument('--no-padding', action='store_true',
+                       help="Ciphertext was made without padding (short plaintext zero-filled)")
+    audit.add_argument('--workers', type=positive_int_arg, default=None, help="Worker processes (default: all cores)")
+    audit.set_defaults(func=audit_command)
+    
+    batch = subparsers.add_parser('batch', help="Encrypt or decrypt a directory tree or manifest of files")
+    batch.add_argument('operation', choices=['encrypt', 'decrypt'])
+    batch.add_argument('source', help="Directory to walk, or manifest file with one path per line")
+    batch.add_argument('output', help="Directory to write results to (mirrors the source layout)")
+    key_source = batch.add_mutually_exclusive_group(required=True)
+    key_source.add_argument('--key1', help="ASCII key 1")
+    key_source.add_argument('--schedule-file', help="Use keys from a file written by 'provision'")
+    batch.add_argument('--hex-keys', action='store_true',
+                       help="Keys are 16 hex digits (8 raw bytes) instead of ASCII text")
+    batch.add_argument('--record', type=int, help="Record number in --schedule-file (starting at 0)")
+    batch.add_argument('--key2', help="ASCII key 2 (default: same as key 1)")
+    batch.add_argument('--key3', help="ASCII key 3 (default: same as key 1)")
+    batch.add_argument('--no-padding', action='store_true', help="Zero-fill the last block instead of PKCS#7")
+    batch.add_argument('--workers', type=positive_int_arg, default=None, help="Worker processes (default: all cores)")
+    batch.add_argument('--chunk-size', type=chunk_size_arg, default=BATCH_CHUNK_SIZE,
+                       help="Bytes read per step for each file (bounds memory per worker)")
+    batch.set_defaults(func=batch_command)
+    
+    provision = subparsers.add_parser('provision', help="Generate Three-Key 3DES key triples in bulk")
+    provision.add_argument('count', type=positive_int_arg, help="Number of key triples")
+    provision.add_argument('output', help="Output file")
+    provision.add_argument('--format', choices=['binary', 'text'], default='binary',
+                           help="binary: keys with precomputed schedules (mmap-loadable); text: hex-encoded keys only")
+    provision.set_defaults(func=provision_command)
+    
+    return parser
 
 def main():
     """Main function to handle user interaction"""
@@ -711,4 +1508,14 @@ def main():
 
 # Run the main function if the script is executed directly
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        # Command-line mode, e.g. "python 3des.py audit ..."
+        parser = build_parser()
+        args = parser.parse_args()
+        try:
+            args.func(args)
+        except (ValueError, OSError) as e:
+            # Bad masks, ciphertexts, paths and the like are user errors, not crashes
+            parser.error(str(e))
+    else:
+        main()
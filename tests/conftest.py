@@ -0,0 +1,17 @@
+"""
+Shared test setup
+3des.py is not importable by name, so it is loaded from its path and registered as
+'triple_des'; registering it lets multiprocessing workers find the module's functions
+"""
+
+import importlib.util
+import os
+import sys
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '3des.py')
+
+if 'triple_des' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('triple_des', MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['triple_des'] = module
+    spec.loader.exec_module(module)
@@ -0,0 +1,107 @@
+"""
+Tests for the integer DES path and the key-strength audit
+3des.py is loaded as 'triple_des' by conftest.py
+"""
+
+import random
+
+import pytest
+
+import triple_des
+
+PLAINTEXT = "Invoice #1234"
+KEY = "ab12"
+
+# 'ab12' padded to 8 characters, with every character swapped for its parity twin
+# where that twin is also allowed by the mask ('a' and '`' are not both lowercase)
+AB12_EQUIVALENTS = ['ab02    ', 'ab03    ', 'ab12    ', 'ab13    ',
+                    'ac02    ', 'ac03    ', 'ac12    ', 'ac13    ']
+
+def encrypt_single_key(plaintext, key, use_padding=True):
+    """Ciphertext hex of plaintext under Single-Key 3DES"""
+    return triple_des.triple_des_encrypt(plaintext, key, key, key, use_padding)[1]
+
+def des_block_int(block, subkeys):
+    """Full DES block (IP, rounds, FP) through the integer path"""
+    permuted = triple_des.permute_int(block, triple_des.IP_TABLES)
+    return triple_des.permute_int(triple_des.des_rounds_int(permuted, subkeys), triple_des.FP_TABLES)
+
+def test_integer_des_matches_string_des():
+    rng = random.Random(1234)
+    for _ in range(50):
+        key = format(rng.getrandbits(64), '064b')
+        block = format(rng.getrandbits(64), '064b')
+        subkeys = [int(subkey, 2) for subkey in triple_des.generate_subkeys(key)]
+
+        assert des_block_int(int(block, 2), subkeys) == int(triple_des.des_encrypt(block, key), 2)
+        assert des_block_int(int(block, 2), subkeys[::-1]) == int(triple_des.des_decrypt(block, key), 2)
+
+def test_schedule_table_matches_generate_subkeys():
+    table = triple_des.build_schedule_table()
+    for key in ["abc", "Zq9!x_ ~", "password", "\xff\x00\x80abcde"]:
+        padded = key.ljust(8)[:8]
+        schedule = 0
+        for i, char in enumerate(padded):
+            schedule |= table[i][ord(char)]
+        expected = triple_des.generate_subkeys(triple_des.prepare_key(key))
+        assert triple_des.schedule_to_int_subkeys(schedule) == [int(subkey, 2) for subkey in expected]
+
+def test_mask_audit_finds_key_and_parity_equivalents():
+    ciphertext = encrypt_single_key(PLAINTEXT, KEY)
+    found, covered, tested, _ = triple_des.audit_keys(PLAINTEXT, ciphertext, mask='?l?l?d?d', workers=2)
+
+    assert found == AB12_EQUIVALENTS
+    assert covered == 26 * 26 * 10 * 10
+    assert tested < covered
+
+def test_mask_audit_without_match():
+    ciphertext = encrypt_single_key(PLAINTEXT, "zz99")
+    found, covered, _, _ = triple_des.audit_keys(PLAINTEXT, ciphertext, mask='ab?d', workers=2)
+
+    assert found == []
+    assert covered == 10
+
+def test_wordlist_audit_truncates_and_deduplicates():
+    ciphertext = encrypt_single_key(PLAINTEXT, "secret12")
+    wordlist = ["hello", "secret12-and-more", "secret12", "hello", "caf€"]
+    found, covered, tested, _ = triple_des.audit_keys(PLAINTEXT, ciphertext, wordlist=wordlist,
+                                                      workers=2, chunk_size=1)
+
+    # Both "secret12..." words truncate to the same key, and the non-latin-1 word is dropped
+    assert found == ["secret12"]
+    assert covered == tested == 2
+
+def test_wordlist_audit_shares_prefixes_within_a_chunk():
+    ciphertext = encrypt_single_key(PLAINTEXT, "abcdefgh")
+    wordlist = ["abcdefgh", "abcdefgi", "abcdexyz", "abzzzzzz"]
+    found, _, _, _ = triple_des.audit_keys(PLAINTEXT, ciphertext, wordlist=wordlist, workers=1)
+
+    # 'abcdefgi' differs from the key only in a parity bit, so it matches too
+    assert found == ["abcdefgh", "abcdefgi"]
+
+def test_audit_without_padding():
+    ciphertext = encrypt_single_key("hi", KEY, use_padding=False)
+
+    found, _, _, _ = triple_des.audit_keys("hi", ciphertext, mask='ab12', workers=1, use_padding=False)
+    assert found == ["ab12    "]
+    found, _, _, _ = triple_des.audit_keys("hi", ciphertext, mask='ab12', workers=1)
+    assert found == []
+
+def test_audit_rejects_short_ciphertext():
+    with pytest.raises(ValueError):
+        triple_des.audit_keys(PLAINTEXT, "0011", mask='ab12', workers=1)
+
+def test_parse_mask_pads_with_spaces():
+    assert triple_des.parse_mask('ab') == ['a', 'b'] + [' '] * 6
+
+def test_parse_mask_truncates_to_eight_positions():
+    assert triple_des.parse_mask('?d' * 10) == [triple_des.MASK_CHARSETS['d']] * 8
+
+def test_parse_mask_placeholders():
+    charsets = triple_des.parse_mask('?u??x?s')
+    assert charsets[:4] == [triple_des.MASK_CHARSETS['u'], '?', 'x', triple_des.MASK_CHARSETS['s']]
+
+@pytest.mark.parametrize('mask', ['?x', 'ab€'])
+def test_parse_mask_rejects_invalid_input(mask):
+    with pytest.raises(ValueError):
+        triple_des.parse_mask(mask)
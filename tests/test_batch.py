@@ -0,0 +1,159 @@
+"""
+Tests for batch file processing (stream_file, collect_batch_files, batch_command)
+3des.py is loaded as 'triple_des' by conftest.py
+"""
+
+import os
+
+import pytest
+
+import triple_des
+
+KEYS = ("key one", "key two", "key three")
+
+def encryption_schedules():
+    return triple_des.triple_des_schedules(*KEYS)
+
+def decryption_schedules():
+    return triple_des.triple_des_schedules(*KEYS, decrypt=True)
+
+def round_trip(tmp_path, data, use_padding=True, chunk_size=triple_des.BATCH_CHUNK_SIZE):
+    """Encrypt and decrypt data through stream_file, returning (ciphertext, plaintext)"""
+    source = tmp_path / 'plain'
+    encrypted = tmp_path / 'plain.3des'
+    decrypted = tmp_path / 'plain.dec'
+    source.write_bytes(data)
+
+    triple_des.stream_file(str(source), str(encrypted), encryption_schedules(),
+                           use_padding=use_padding, chunk_size=chunk_size)
+    triple_des.stream_file(str(encrypted), str(decrypted), decryption_schedules(), decrypt=True,
+                           use_padding=use_padding, chunk_size=chunk_size)
+    return encrypted.read_bytes(), decrypted.read_bytes()
+
+@pytest.mark.parametrize('size', [0, 8, 11, 1000])
+@pytest.mark.parametrize('chunk_size', [8, 24, triple_des.BATCH_CHUNK_SIZE])
+def test_round_trip_with_padding(tmp_path, size, chunk_size):
+    data = os.urandom(size)
+    ciphertext, plaintext = round_trip(tmp_path, data, chunk_size=chunk_size)
+
+    # PKCS#7 always adds padding, a full block when the input is already aligned
+    assert len(ciphertext) == (size // 8 + 1) * 8
+    assert plaintext == data
+
+@pytest.mark.parametrize('size', [0, 8, 11, 1000])
+@pytest.mark.parametrize('chunk_size', [8, 24])
+def test_round_trip_without_padding_zero_fills(tmp_path, size, chunk_size):
+    data = os.urandom(size)
+    ciphertext, plaintext = round_trip(tmp_path, data, use_padding=False, chunk_size=chunk_size)
+
+    aligned = (size + 7) // 8 * 8
+    assert len(ciphertext) == aligned
+    assert plaintext == data + b'\0' * (aligned - size)
+
+def test_round_trip_large_file(tmp_path):
+    data = os.urandom(200 * 1024 + 3)
+    _, plaintext = round_trip(tmp_path, data, chunk_size=4096)
+    assert plaintext == data
+
+def test_stream_file_matches_triple_des_encrypt(tmp_path):
+    plaintext = "Invoice #1234"
+    ciphertext, _ = round_trip(tmp_path, plaintext.encode('latin-1'), chunk_size=8)
+    assert ciphertext.hex() == triple_des.triple_des_encrypt(plaintext, *KEYS)[1]
+
+def test_failed_job_leaves_no_partial_file(tmp_path):
+    source = tmp_path / 'bad.3des'
+    destination = tmp_path / 'bad'
+    source.write_bytes(b'abc')
+
+    with pytest.raises(ValueError):
+        triple_des.stream_file(str(source), str(destination), decryption_schedules(), decrypt=True)
+    assert not destination.exists()
+    assert not (tmp_path / 'bad.part').exists()
+
+def test_batch_output_path():
+    assert triple_des.batch_output_path('a/b.txt', 'out') == os.path.join('out', 'a/b.txt.3des')
+    assert triple_des.batch_output_path('a/b.txt.3des', 'out', decrypt=True) == os.path.join('out', 'a/b.txt')
+    assert triple_des.batch_output_path('b.bin', 'out', decrypt=True) == os.path.join('out', 'b.bin.dec')
+
+def test_collect_skips_output_directory_inside_source(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'out').mkdir()
+    (tmp_path / 'a.txt').write_bytes(b'a')
+    (tmp_path / 'sub' / 'b.txt').write_bytes(b'b')
+    (tmp_path / 'out' / 'a.txt.3des').write_bytes(b'x' * 8)
+
+    files = triple_des.collect_batch_files(str(tmp_path), str(tmp_path / 'out'))
+    assert sorted(relative for _, relative in files) == ['a.txt', os.path.join('sub', 'b.txt')]
+
+def test_collect_rejects_output_equal_to_source(tmp_path):
+    with pytest.raises(ValueError):
+        triple_des.collect_batch_files(str(tmp_path), str(tmp_path) + os.sep)
+
+def test_collect_reads_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text("# comment\n\na.txt\nsub/b.txt\n")
+
+    files = triple_des.collect_batch_files(str(manifest), str(tmp_path / 'out'))
+    assert [relative for _, relative in files] == ['a.txt', os.path.join('sub', 'b.txt')]
+    assert files[0][0] == os.path.join(str(tmp_path), 'a.txt')
+
+def test_collect_rejects_manifest_entry_outside_its_directory(tmp_path):
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text("../secret.txt\n")
+    with pytest.raises(ValueError):
+        triple_des.collect_batch_files(str(manifest), str(tmp_path / 'out'))
+
+def run_batch(*argv):
+    args = triple_des.build_parser().parse_args(['batch', *argv, '--workers', '1',
+                                                 '--key1', KEYS[0], '--key2', KEYS[1], '--key3', KEYS[2]])
+    args.func(args)
+
+def test_batch_round_trip_and_resume(tmp_path, capsys):
+    source = tmp_path / 'src'
+    (source / 'sub').mkdir(parents=True)
+    files = {'a.txt': b'Invoice #1234', 'empty': b'', os.path.join('sub', 'c.bin'): os.urandom(3000)}
+    for name, data in files.items():
+        (source / name).write_bytes(data)
+    encrypted = tmp_path / 'enc'
+    decrypted = tmp_path / 'dec'
+
+    run_batch('encrypt', str(source), str(encrypted))
+    run_batch('decrypt', str(encrypted), str(decrypted))
+    for name, data in files.items():
+        assert (decrypted / name).read_bytes() == data
+
+    # A rerun only redoes the file whose output is missing
+    kept = encrypted / 'a.txt.3des'
+    os.utime(kept, (0, 0))
+    os.remove(encrypted / 'sub' / 'c.bin.3des')
+    capsys.readouterr()
+    run_batch('encrypt', str(source), str(encrypted))
+
+    output = capsys.readouterr().out
+    assert "Files to process: 1 (skipped 2 already done)" in output
+    assert os.path.getmtime(kept) == 0
+    assert (encrypted / 'sub' / 'c.bin.3des').exists()
+
+def test_batch_continues_past_missing_manifest_entry(tmp_path, capsys):
+    (tmp_path / 'a.txt').write_bytes(b'hello')
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text("a.txt\nmissing.txt\n")
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_batch('encrypt', str(manifest), str(tmp_path / 'out'))
+
+    assert exit_info.value.code == 1
+    assert "Processed: 1, skipped: 0, failed: 1" in capsys.readouterr().out
+    assert (tmp_path / 'out' / 'a.txt.3des').exists()
+
+@pytest.mark.parametrize('argv', [
+    ['--key1', 'k', '--record', '0'],
+    ['--schedule-file', 'keys.bin', '--record', '0', '--key2', 'k'],
+    ['--schedule-file', 'keys.bin', '--record', '0', '--key3', 'k'],
+    ['--schedule-file', 'keys.bin', '--record', '0', '--hex-keys'],
+    ['--schedule-file', 'keys.bin'],
+])
+def test_batch_rejects_conflicting_key_options(tmp_path, argv):
+    args = triple_des.build_parser().parse_args(['batch', 'encrypt', str(tmp_path), str(tmp_path / 'out'), *argv])
+    with pytest.raises(ValueError):
+        args.func(args)
@@ -0,0 +1,95 @@
+"""
+Tests for the provisioned key schedule file (provision / --schedule-file)
+3des.py is loaded as 'triple_des' by conftest.py
+"""
+
+import os
+
+import pytest
+
+import triple_des
+
+RECORD_COUNT = 20
+
+@pytest.fixture
+def schedule_file(tmp_path):
+    """Write a small schedule file and return its path"""
+    path = str(tmp_path / 'keys.bin')
+    triple_des.write_schedule_file(path, triple_des.generate_key_triples(RECORD_COUNT), RECORD_COUNT)
+    return path
+
+def test_records_match_generate_subkeys(schedule_file):
+    """Stored schedules are exactly what generate_subkeys produces for the stored keys"""
+    mapping, count = triple_des.open_schedule_file(schedule_file)
+    try:
+        assert count == RECORD_COUNT
+        for index in range(count):
+            keys, subkey_lists = triple_des.read_schedule_record(mapping, count, index)
+            for key, subkeys in zip(keys, subkey_lists):
+                expected = triple_des.generate_subkeys(triple_des.prepare_key(key))
+                assert subkeys == [int(subkey, 2) for subkey in expected]
+    finally:
+        mapping.close()
+
+def test_record_schedules_encrypt_like_triple_des_encrypt(schedule_file):
+    """Encrypting with a loaded record matches triple_des_encrypt with the same keys"""
+    mapping, count = triple_des.open_schedule_file(schedule_file)
+    try:
+        keys, subkey_lists = triple_des.read_schedule_record(mapping, count, count - 1)
+    finally:
+        mapping.close()
+
+    plaintext = "Invoice #1234"
+    padded = triple_des.pad_text(plaintext).encode('latin-1')
+    encrypted = triple_des.triple_des_process_bytes(padded, triple_des.arrange_schedules(*subkey_lists))
+    assert encrypted.hex() == triple_des.triple_des_encrypt(plaintext, *keys)[1]
+
+    decrypted = triple_des.triple_des_process_bytes(
+        encrypted, triple_des.arrange_schedules(*subkey_lists, decrypt=True))
+    assert decrypted == padded
+
+@pytest.mark.parametrize('index', [-1, RECORD_COUNT])
+def test_out_of_range_record_raises(schedule_file, index):
+    mapping, count = triple_des.open_schedule_file(schedule_file)
+    try:
+        with pytest.raises(IndexError):
+            triple_des.read_schedule_record(mapping, count, index)
+    finally:
+        mapping.close()
+
+@pytest.mark.parametrize('data', [b'', b'3DKS', b'XXXX' + bytes(20)])
+def test_invalid_file_raises_value_error(tmp_path, data):
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        triple_des.open_schedule_file(str(path))
+
+def test_truncated_file_raises_value_error(schedule_file):
+    with open(schedule_file, 'rb+') as f:
+        f.truncate(os.path.getsize(schedule_file) - 5)
+    with pytest.raises(ValueError, match="truncated"):
+        triple_des.open_schedule_file(schedule_file)
+
+def test_generated_keys_use_full_bytes():
+    keys = [key for triple in triple_des.generate_key_triples(50) for key in triple]
+    assert all(len(key) == 8 for key in keys)
+    # 1200 random bytes without one outside printable ASCII would be astronomically unlikely
+    assert any(ord(char) > 0x7E or ord(char) < 0x20 for key in keys for char in key)
+
+def test_generate_key_triples_rejects_weak_and_degenerate_keys(monkeypatch):
+    weak = bytes.fromhex('E001E001F101F101').decode('latin-1')
+    key_a = "A" * 8
+    key_a_parity_twin = "@" * 8
+    key_b = "B" * 8
+    key_c = "D" * 8
+    scripted = iter([weak, key_a, key_a_parity_twin, key_b, weak, key_b, key_c])
+    monkeypatch.setattr(triple_des, 'random_keys', lambda: scripted)
+
+    assert list(triple_des.generate_key_triples(1)) == [(key_a, key_b, key_c)]
+
+def test_hex_to_key():
+    assert triple_des.hex_to_key('00ff414243444546') == '\x00\xffABCDEF'
+    with pytest.raises(ValueError):
+        triple_des.hex_to_key('00ff')
+    with pytest.raises(ValueError):
+        triple_des.hex_to_key('zz' * 8)